@@ -1,3 +1,4 @@
+from issue_record import load_issues
 import json
 import requests
 import sys
@@ -5,9 +6,18 @@ import sys
 '''
 This program takes a GH Organization and V2 Project, and a JSON file listing the issues we want 
 to have in that Project.  It determines which of those issues are not already in the Project, and adds them.
+
+In its sync-fields mode, it instead takes the issues.csv file produced by get_issue_data.py, and copies the
+ZenHub estimate and pipeline of each issue into the Project's "Estimate" (number) and "Pipeline" (single
+select) fields.  The current field values of all the Project's items are read in bulk, and only the items
+whose values differ are updated, with many aliased mutations sent per request.
 This script uses the GitHub GraphQL API documented here: https://docs.github.com/en/graphql
 '''
 class MissingIssues:
+    ESTIMATE_FIELD = 'Estimate'
+    PIPELINE_FIELD = 'Pipeline'
+    MUTATIONS_PER_REQUEST = 50
+
     def __init__(self, github_pat, org_name, proj_name):
         self.github_pat = github_pat
         self.org_name = org_name
@@ -21,6 +31,14 @@ class MissingIssues:
         else:
             raise Exception("Query failed to run by returning code of {}. {}".format(request.status_code, query))
 
+    def run_mutations(self, mutations):
+        if not mutations:
+            return
+        query = 'mutation {\n' + '\n'.join(f'm{i}: {mutation}' for i, mutation in enumerate(mutations)) + '\n}'
+        result = self.run_query(query)
+        if 'errors' in result:
+            raise Exception(f'Mutations failed: {result["errors"]}')
+
     def lookup_project(self):
         query = f'''
         query {{
@@ -29,6 +47,21 @@ class MissingIssues:
               nodes {{
                 title
                 id
+                fields(first: 50) {{
+                  nodes {{
+                    ... on ProjectV2FieldCommon {{
+                      id
+                      name
+                      dataType
+                    }}
+                    ... on ProjectV2SingleSelectField {{
+                      options {{
+                        id
+                        name
+                      }}
+                    }}
+                  }}
+                }}
               }}
             }}
           }}
@@ -48,6 +81,116 @@ class MissingIssues:
         '''
         return self.run_query(query)
 
+    def get_project_items(self, project):
+        # Returns a dict from issue fqn to (item id, {field name: value}) for all the Project's issues.
+        items = dict()
+        after = ''
+        has_next_page = True
+        while has_next_page:
+            query = f'''
+            query {{
+              node(id: "{project['id']}") {{
+                ... on ProjectV2 {{
+                  items(first: 100{after}) {{
+                    pageInfo {{
+                      hasNextPage
+                      endCursor
+                    }}
+                    nodes {{
+                      id
+                      content {{
+                        ... on Issue {{
+                          number
+                          repository {{
+                            nameWithOwner
+                          }}
+                        }}
+                      }}
+                      estimate: fieldValueByName(name: "{MissingIssues.ESTIMATE_FIELD}") {{
+                        ... on ProjectV2ItemFieldNumberValue {{
+                          number
+                        }}
+                      }}
+                      pipeline: fieldValueByName(name: "{MissingIssues.PIPELINE_FIELD}") {{
+                        ... on ProjectV2ItemFieldSingleSelectValue {{
+                          name
+                        }}
+                      }}
+                    }}
+                  }}
+                }}
+              }}
+            }}
+            '''
+            result = self.run_query(query)
+            if 'errors' in result:
+                raise Exception(f'Reading project items failed: {result["errors"]}')
+            page = result['data']['node']['items']
+            for item in page['nodes']:
+                content = item['content']
+                # Draft issues and pull requests have no Issue content.
+                if not content or 'number' not in content:
+                    continue
+                values = {MissingIssues.ESTIMATE_FIELD: (item['estimate'] or {}).get('number'),
+                          MissingIssues.PIPELINE_FIELD: (item['pipeline'] or {}).get('name')}
+                items[f"{content['repository']['nameWithOwner']}/{content['number']}"] = (item['id'], values)
+            print(f'  read {len(items)} project items', file=sys.stderr)
+            has_next_page = page['pageInfo']['hasNextPage']
+            if has_next_page:
+                after = f', after: "{page["pageInfo"]["endCursor"]}"'
+        return items
+
+    @staticmethod
+    def field_update(project, item_id, field, value):
+        target = f'projectId: "{project["id"]}" itemId: "{item_id}" fieldId: "{field["id"]}"'
+        if value is None:
+            return f'clearProjectV2ItemFieldValue(input: {{{target}}}) {{ projectV2Item {{ id }} }}'
+        if 'options' in field:
+            value = f'{{singleSelectOptionId: "{value}"}}'
+        else:
+            value = f'{{number: {value}}}'
+        return f'updateProjectV2ItemFieldValue(input: {{{target} value: {value}}}) {{ projectV2Item {{ id }} }}'
+
+    def sync_fields(self, issues_csv_path):
+        project = self.lookup_project()
+        fields = {field['name']: field for field in project['fields']['nodes'] if field}
+        for name, data_type in ((MissingIssues.ESTIMATE_FIELD, 'NUMBER'),
+                                (MissingIssues.PIPELINE_FIELD, 'SINGLE_SELECT')):
+            if name not in fields:
+                print(f'project {self.proj_name} has no {name} field', file=sys.stderr)
+                sys.exit(1)
+            if fields[name].get('dataType') != data_type:
+                print(f'the {name} field of project {self.proj_name} must be of type {data_type}, '
+                      f'not {fields[name].get("dataType")}', file=sys.stderr)
+                sys.exit(1)
+        estimate_field = fields[MissingIssues.ESTIMATE_FIELD]
+        pipeline_field = fields[MissingIssues.PIPELINE_FIELD]
+        pipeline_options = {option['name']: option['id'] for option in pipeline_field['options']}
+        items = self.get_project_items(project)
+
+        mutations = []
+        for issue in load_issues(issues_csv_path):
+            if issue.fqn not in items:
+                continue
+            item_id, values = items[issue.fqn]
+            current_estimate = values.get(MissingIssues.ESTIMATE_FIELD)
+            if (issue.estimate is None) != (current_estimate is None) or \
+                    (issue.estimate is not None and float(issue.estimate) != current_estimate):
+                print(f'{issue.fqn} estimate {current_estimate} -> {issue.estimate}')
+                mutations.append(MissingIssues.field_update(project, item_id, estimate_field, issue.estimate))
+            if values.get(MissingIssues.PIPELINE_FIELD) != issue.pipeline:
+                if issue.pipeline not in pipeline_options:
+                    print(f'{issue.fqn} pipeline {issue.pipeline} is not an option of the project\'s '
+                          f'{MissingIssues.PIPELINE_FIELD} field', file=sys.stderr)
+                else:
+                    print(f'{issue.fqn} pipeline {values.get(MissingIssues.PIPELINE_FIELD)} -> {issue.pipeline}')
+                    mutations.append(MissingIssues.field_update(project, item_id, pipeline_field,
+                                                                pipeline_options[issue.pipeline]))
+
+        for start in range(0, len(mutations), MissingIssues.MUTATIONS_PER_REQUEST):
+            self.run_mutations(mutations[start:start + MissingIssues.MUTATIONS_PER_REQUEST])
+        print(f'updated {len(mutations)} field values in {len(items)} project items', file=sys.stderr)
+
     def run(self, issues_json_path):
         project = self.lookup_project()
         with open(issues_json_path) as f:
@@ -64,7 +207,11 @@ class MissingIssues:
                     print(f'{issue["id"]} {issue["repository"]["name"]}/{issue["number"]} -> {proj_id}')
 
 if __name__ == '__main__':
-    if len(sys.argv) < 4:
+    if len(sys.argv) == 6 and sys.argv[4] == 'sync-fields':
+        MissingIssues(sys.argv[1], sys.argv[2], sys.argv[3]).sync_fields(sys.argv[5])
+        sys.exit(0)
+    if len(sys.argv) < 5:
         print(f'usage: {sys.argv[0]} GHPAT org-name project-name issues.json', file=sys.stderr)
+        print(f'       {sys.argv[0]} GHPAT org-name project-name sync-fields issues.csv', file=sys.stderr)
         sys.exit(1)
     MissingIssues(sys.argv[1], sys.argv[2], sys.argv[3]).run(sys.argv[4])
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import pickle
+import team_rules
+from team_rules import TeamClassifier
+
+'''
+Load config.yml, together with the indexes the tools derive from it, through a binary cache.
+
+Parsing YAML means importing the yaml module and then compiling the team_labels rules into a
+TeamClassifier, which dominates the start up time of the short running tools.  The parsed and compiled config
+is therefore pickled into __pycache__ next to the config file.  The cache records the version of its
+format, the mtime, size and SHA-256 of the config file it was built from, and the SHA-256 of the code that
+built it (this module and team_rules.py, whose TeamClassifier is pickled).  It is only used when all of
+these match, and is rebuilt otherwise.  The header is checked before the config itself is unpickled.
+'''
+
+CACHE_VERSION = 4
+
+REQUIRED_KEYS = ('github_orgs', 'team_labels', 'person_to_team')
+
+
+def cache_path_for(config_path):
+    config_dir, config_name = os.path.split(os.path.abspath(config_path))
+    return os.path.join(config_dir, '__pycache__', config_name + '.cache')
+
+
+def code_digest():
+    digest = hashlib.sha256()
+    for module_path in (__file__, team_rules.__file__):
+        with open(module_path, 'rb') as module_file:
+            digest.update(module_file.read())
+    return digest.hexdigest()
+
+
+def cache_header(stat, config_bytes):
+    return CACHE_VERSION, stat.st_mtime_ns, stat.st_size, hashlib.sha256(config_bytes).hexdigest(), code_digest()
+
+
+def compile_config(config):
+    '''Validate a freshly parsed config, and add the compiled label->team classifier the tools use.'''
+    if not isinstance(config, dict):
+        raise ValueError('config must be a mapping of entries')
+    for key in REQUIRED_KEYS:
+        if key not in config:
+            raise ValueError(f'config is missing required entry {key}')
+    config['person_to_team'] = dict(config['person_to_team'] or {})
+    config['team_classifier'] = TeamClassifier(config['team_labels'], config['person_to_team'],
+                                               config.get('team_priorities'))
+    return config
+
+
+def parse_config(config_bytes):
+    import yaml
+    return compile_config(yaml.load(config_bytes, Loader=yaml.FullLoader))
+
+
+def read_cache(cache_path, stat, config_bytes):
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            # The config file and the code are small, so hashing them is cheap, and also catches edits that
+            # preserved the mtime.
+            if pickle.load(cache_file) != cache_header(stat, config_bytes):
+                return None
+            return pickle.load(cache_file)
+    except Exception:
+        # A missing, corrupt or stale cache (e.g. one pickling a class that has since moved) is simply rebuilt.
+        return None
+
+
+def write_cache(cache_path, stat, config_bytes, config):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as cache_file:
+            pickle.dump(cache_header(stat, config_bytes), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(config, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is only an optimization; a read-only checkout still works, it is just slower.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_config(config_path):
+    with open(config_path, 'rb') as config_file:
+        stat = os.fstat(config_file.fileno())
+        config_bytes = config_file.read()
+    cache_path = cache_path_for(config_path)
+    config = read_cache(cache_path, stat, config_bytes)
+    if config is None:
+        config = parse_config(config_bytes)
+        write_cache(cache_path, stat, config_bytes, config)
+    return config
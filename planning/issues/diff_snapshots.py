@@ -0,0 +1,178 @@
+import csv
+import json
+import sys
+from issue_record import load_issues
+
+'''
+Compare two snapshots of the issues.csv (and optionally rels.csv) files produced by get_issue_data.py,
+typically taken on different days, and report what changed between them:
+    * Issues added to and removed from the release
+    * Changes of estimate, assignee and pipeline, and issues that were closed
+    * The net change in estimated story points, by assignee and by team (epics excluded)
+    * Counts of the pipeline transitions
+    * Epic and blocker relationships that were added or removed
+
+The output is one JSON object per line on stdout, so it can be loaded by dashboards directly.  Each change
+is a line of its own, and the last line is the summary, with "change" set to "summary".
+
+The snapshots are joined on repo/issue.  When both files are sorted by repo and issue number they are
+merge-joined while streaming, so memory use does not grow with the size of the files.  Otherwise the old
+snapshot is loaded into a hash index and the new snapshot is streamed against it.
+'''
+
+def issue_key(issue):
+    return issue.repo, issue.number
+
+
+def snapshot_is_sorted(issues_path):
+    prev_key = None
+    for issue in load_issues(issues_path):
+        key = issue_key(issue)
+        if prev_key is not None and key <= prev_key:
+            return False
+        prev_key = key
+    return True
+
+
+def merge_join(old_issues, new_issues):
+    '''Yield (old, new) pairs from two snapshots sorted by issue_key; either side is None if missing.'''
+    old_issue = next(old_issues, None)
+    new_issue = next(new_issues, None)
+    while old_issue or new_issue:
+        if new_issue is None or (old_issue and issue_key(old_issue) < issue_key(new_issue)):
+            yield old_issue, None
+            old_issue = next(old_issues, None)
+        elif old_issue is None or issue_key(new_issue) < issue_key(old_issue):
+            yield None, new_issue
+            new_issue = next(new_issues, None)
+        else:
+            yield old_issue, new_issue
+            old_issue = next(old_issues, None)
+            new_issue = next(new_issues, None)
+
+
+def hash_join(old_issues, new_issues):
+    '''Yield (old, new) pairs from two unsorted snapshots; either side is None if missing.'''
+    old_by_fqn = {issue.fqn: issue for issue in old_issues}
+    for new_issue in new_issues:
+        yield old_by_fqn.pop(new_issue.fqn, None), new_issue
+    for old_issue in old_by_fqn.values():
+        yield old_issue, None
+
+
+def load_rels(rels_path):
+    with open(rels_path, newline='') as rels_file:
+        for rel in csv.DictReader(rels_file):
+            yield rel['from'], rel['rel'], rel['to']
+
+
+class SnapshotDiff:
+    def __init__(self, output):
+        self.output = output
+        self.added_count = 0
+        self.removed_count = 0
+        self.estimate_delta = 0
+        self.estimate_delta_by_assignee = dict()
+        self.estimate_delta_by_team = dict()
+        self.pipeline_transitions = dict()
+        self.edges_added_count = 0
+        self.edges_removed_count = 0
+
+    def write_change(self, change, **fields):
+        self.output.write(json.dumps(dict(change=change, **fields)) + '\n')
+
+    @staticmethod
+    def dict_numeric_add(d: dict, key, number):
+        d[key] = d.get(key, 0) + number
+
+    @staticmethod
+    def describe(issue):
+        return dict(issue=issue.fqn, assignee=issue.assignee, estimate=issue.estimate, pipeline=issue.pipeline,
+                    teams=list(issue.teams), url=issue.url, title=issue.title)
+
+    def add_estimate(self, issue, sign):
+        # An issue's points move from its old assignee and teams to its new ones, so a reassignment shows up
+        # as a drop for one assignee and a rise for the other, and an unchanged issue nets out to zero.
+        # The estimate of an epic is the sum of its sub issues, so as in gen_report.py, epics are not counted.
+        if issue.is_epic:
+            return
+        points = sign * (issue.estimate or 0)
+        self.estimate_delta += points
+        SnapshotDiff.dict_numeric_add(self.estimate_delta_by_assignee, issue.assignee or 'unassigned', points)
+        for team in issue.teams or ('no-team',):
+            SnapshotDiff.dict_numeric_add(self.estimate_delta_by_team, team, points)
+
+    def process_pair(self, old_issue, new_issue):
+        if (old_issue or new_issue).is_pr:
+            return
+        if old_issue:
+            self.add_estimate(old_issue, -1)
+        if new_issue:
+            self.add_estimate(new_issue, 1)
+
+        if not old_issue:
+            self.added_count += 1
+            self.write_change('added', **SnapshotDiff.describe(new_issue))
+            return
+        if not new_issue:
+            self.removed_count += 1
+            self.write_change('removed', **SnapshotDiff.describe(old_issue))
+            return
+
+        for field in ('estimate', 'assignee', 'pipeline'):
+            old_value = getattr(old_issue, field)
+            new_value = getattr(new_issue, field)
+            if old_value != new_value:
+                self.write_change(field, issue=new_issue.fqn, old=old_value, new=new_value, url=new_issue.url)
+        if old_issue.pipeline != new_issue.pipeline:
+            SnapshotDiff.dict_numeric_add(self.pipeline_transitions, (old_issue.pipeline, new_issue.pipeline), 1)
+        if new_issue.is_closed and not old_issue.is_closed:
+            self.write_change('closed', issue=new_issue.fqn, closed_at=new_issue.field('closed_at'),
+                              estimate=new_issue.estimate, url=new_issue.url)
+
+    def diff_issues(self, old_path, new_path):
+        if snapshot_is_sorted(old_path) and snapshot_is_sorted(new_path):
+            pairs = merge_join(load_issues(old_path), load_issues(new_path))
+        else:
+            pairs = hash_join(load_issues(old_path), load_issues(new_path))
+        for old_issue, new_issue in pairs:
+            self.process_pair(old_issue, new_issue)
+
+    def diff_rels(self, old_path, new_path):
+        old_rels = set(load_rels(old_path))
+        for rel in load_rels(new_path):
+            if rel in old_rels:
+                old_rels.discard(rel)
+            else:
+                self.edges_added_count += 1
+                self.write_change('edge_added', **{'from': rel[0], 'rel': rel[1], 'to': rel[2]})
+        for rel in sorted(old_rels):
+            self.edges_removed_count += 1
+            self.write_change('edge_removed', **{'from': rel[0], 'rel': rel[1], 'to': rel[2]})
+
+    def write_summary(self):
+        self.write_change('summary',
+                          added=self.added_count,
+                          removed=self.removed_count,
+                          estimate_delta=self.estimate_delta,
+                          estimate_delta_by_assignee={k: v for k, v in
+                                                      sorted(self.estimate_delta_by_assignee.items()) if v},
+                          estimate_delta_by_team={k: v for k, v in
+                                                  sorted(self.estimate_delta_by_team.items()) if v},
+                          pipeline_transitions=[{'from': old, 'to': new, 'count': count} for (old, new), count
+                                                in sorted(self.pipeline_transitions.items(),
+                                                          key=lambda item: item[1], reverse=True)],
+                          edges_added=self.edges_added_count,
+                          edges_removed=self.edges_removed_count)
+
+    def run(self, old_issues_path, new_issues_path, old_rels_path=None, new_rels_path=None):
+        self.diff_issues(old_issues_path, new_issues_path)
+        if old_rels_path and new_rels_path:
+            self.diff_rels(old_rels_path, new_rels_path)
+        self.write_summary()
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 5):
+        print(f'usage: {sys.argv[0]} old-issues.csv new-issues.csv [old-rels.csv new-rels.csv]', file=sys.stderr)
+        sys.exit(1)
+    SnapshotDiff(sys.stdout).run(*sys.argv[1:])
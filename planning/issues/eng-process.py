@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import os
+import runpy
+import sys
+
+'''
+A single entry point for the issue planning tools in this directory:
+
+    eng-process.py <command> [args ...]
+
+Each command runs the corresponding script exactly as if it had been launched directly, with the same
+arguments.  Only the script for the chosen command is loaded, so a command never pays for importing
+the dependencies (github, zenhub, yaml, requests) of the other tools.
+'''
+
+COMMANDS = {
+    'get-issue-data': 'get_issue_data.py',
+    'gen-report': 'gen_report.py',
+    'viz-issues': 'viz_issues.py',
+    'sync-milestone': 'sync_milestone.py',
+    'list-org-issues': 'list-org-issues.py',
+    'add-issues-to-ghp': 'add-issues-to-ghp.py',
+    'diff-snapshots': 'diff_snapshots.py',
+}
+
+
+def usage():
+    print(f'usage: {sys.argv[0]} command [args ...]', file=sys.stderr)
+    print('commands:', file=sys.stderr)
+    for command, script in COMMANDS.items():
+        print(f'    {command:20s} runs {script}', file=sys.stderr)
+    sys.exit(1)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        usage()
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), COMMANDS[sys.argv[1]])
+    # The tools read their arguments from sys.argv, so present them with what they would have seen
+    # had they been run directly.
+    sys.argv = [script_path] + sys.argv[2:]
+    runpy.run_path(script_path, run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,10 @@
 import csv
+import html
+import io
+import json
 import sys
 from datetime import date, datetime
+from issue_record import load_issues
 
 # Generate a plain text report from the ZenHub and GitHub issue data downloaded and massaged
 # by the get_issue_data.py script.  This report contains the following information:
@@ -15,9 +19,15 @@ from datetime import date, datetime
 #   * Velocity by assignee based on closed issues since beginning of release cycle.
 #   * Calculation of how many actual days of work each engineer has in order to complete the release work.
 # Also, generate a CSV of all issues, by assignee.
+#
+# The issues are aggregated once into a single report, whose groupings are each sorted once, and any of the
+# text, CSV, JSON and HTML renderers below can then be applied to it.  Each renderer builds its whole output
+# in memory and writes it out in one go, to stdout or to a chosen path.
 class GenReport:
     def __init__(self):
         self.default_issue_story_points = None
+        self.start_date = None
+        self.review_issues = []
         self.estimates_by_team = {}
         self.unestimated_by_team = {}
         self.estimates_by_assignee = {}
@@ -47,142 +57,267 @@ class GenReport:
             d[key] = int(number)
 
     @staticmethod
-    def display_dict(title: str, d: dict):
-        print('\n' + title)
-        for key, value in sorted(d.items(), key=lambda item: item[1], reverse=True):
-            print(f'{value:3d} {key}')
-
-    def display_issues(self, title: str, raw_issues: [], cols: [str], order_by=None):
-        issues = raw_issues
-        if order_by:
-            issues = sorted(raw_issues, key=lambda i: i[order_by] if i[order_by] else 'unassigned')
-        print(f'\n{title}: {len(issues)} {float(100 * len(issues) / self.open_issues_count):.2f}%')
-        for issue in issues:
-            print('   ', end='')
-            for col in cols:
-                value = issue[col]
-                if (col == 'assignee') and value == '':
-                    value = 'unassigned'
-                if (col == 'teams') and value == '':
-                    value = 'noteam'
-                print(f' {value}', end='')
-            print()
-
-    def display_issues_by_assignee(self, title: str):
-        print('\n' + title)
-        for key, value in sorted(self.estimates_by_assignee.items(), key=lambda item: item[1], reverse=True):
-            print(f'{value:3d} {key}')
-            for issue in sorted(self.issues_by_assignee[key],
-                                key=lambda i: int(i['estimate']) if i['estimate'] != '' else 0, reverse=True):
-                print(f"    {issue['estimate']} {issue['teams']} {issue['url']} {issue['title']}", end='')
-                if issue['pipeline'] in ('In Progress', 'Up Next'):
-                    print(f" [{issue['pipeline']}]")
-                else:
-                    print('')
-
-    def write_issues_by_assignee_csv(self):
-        with open('assignee_report.csv', 'w') as report:
-            report_writer = csv.writer(report, quotechar='"')
-            report_writer.writerow('assignee estimate team url description')
-            for key, value in sorted(self.estimates_by_assignee.items(), key=lambda item: item[1], reverse=True):
-                for issue in sorted(self.issues_by_assignee[key],
-                                    key=lambda i: int(i['estimate']) if i['estimate'] != '' else 0, reverse=True):
-                    report_writer.writerow([key, issue['estimate'], issue['teams'], issue['url'], issue['title']])
-
-    def display_velocity_report(self):
-        start_date = datetime.strptime(sys.argv[2], '%Y-%m-%d').date()
-        working_days = (date.today() - start_date) * 5.0/7.0
-        print('\nVelocity by assignee')
-        print(f"  Working days completed in this release: {working_days.days}")
-        for assignee, issues in sorted(self.closed_issues_by_assignee.items(), key=lambda item: item[0]):
-            points_completed = sum([int(issue['estimate'] or 0) for issue in issues])
-            points_per_day = points_completed / working_days.days
-            days_of_work = (self.estimates_by_assignee.get(assignee, 0) / points_per_day) if points_completed else 0
-            print(f"  {(assignee or 'unassigned') + ':':14s} {points_completed:2d} pts done -> "
-                  f"{points_per_day:.2f} / day; "
-                  f"{self.estimates_by_assignee.get(assignee, 0):3d} pts for MN-1 -> {int(days_of_work):3d} days "
-                  f" -> {days_of_work / 21.6:.1f} months")
-            for issue in sorted(issues, key=lambda i: i['closed_at'], reverse=True):
-                print(f"    {issue['closed_at'].split(' ')[0]} {issue['estimate'] or ' '} {issue['url']} "
-                      f"{issue['title']}")
+    def sorted_counts(d: dict):
+        return sorted(d.items(), key=lambda item: item[1], reverse=True)
 
     def process_issue(self, issue):
-        if '/pull/' in issue['url']:
+        if issue.is_pr:
             return
-        if issue['closed_at']:
-            GenReport.dict_issues_add(self.closed_issues_by_assignee, issue['assignee'], issue)
+        if issue.is_closed:
+            GenReport.dict_issues_add(self.closed_issues_by_assignee, issue.assignee, issue)
             return
         # Issues that are in the Review/QA pipeline are "almost done", so don't count that as remaining work.
-        if issue['pipeline'] == 'Review/QA':
-            print(f"skipping Review/QA issue {issue['url']} {issue['title']}")
+        if issue.pipeline == 'Review/QA':
+            self.review_issues.append(issue)
             return
         # The estimates on epics the sum of their sub pieces, so ignore these.
-        if 'epic' in issue['labels'].lower().split(';'):
+        if issue.is_epic:
             return
 
         self.open_issues_count += 1
 
-        if issue['assignee'] != '':
-            GenReport.dict_issues_add(self.issues_by_assignee, issue['assignee'], issue)
-            if issue['estimate'] != '':
-                GenReport.dict_numeric_add(self.estimates_by_assignee, issue['assignee'], issue['estimate'])
+        if issue.assignee != '':
+            GenReport.dict_issues_add(self.issues_by_assignee, issue.assignee, issue)
+            if issue.estimate is not None:
+                GenReport.dict_numeric_add(self.estimates_by_assignee, issue.assignee, issue.estimate)
             else:
-                GenReport.dict_numeric_add(self.unestimated_by_assignee, issue['assignee'], 1)
+                GenReport.dict_numeric_add(self.unestimated_by_assignee, issue.assignee, 1)
         else:
             self.issues_with_no_assignee.append(issue)
 
-        if issue['assignee'] == '':
-            if issue['teams'] != '':
-                for team in issue['teams'].split(';'):
+        if issue.assignee == '':
+            if issue.teams:
+                for team in issue.teams:
                     GenReport.dict_numeric_add(self.unassigned_by_team, team, 1)
             else:
                 self.issues_with_no_team_or_assignee.append(issue)
 
-        if issue['teams'] != '':
-            for team in issue['teams'].split(';'):
-                if issue['estimate'] != '':
-                    GenReport.dict_numeric_add(self.estimates_by_team, team, issue['estimate'])
+        if issue.teams:
+            for team in issue.teams:
+                if issue.estimate is not None:
+                    GenReport.dict_numeric_add(self.estimates_by_team, team, issue.estimate)
                 else:
                     GenReport.dict_numeric_add(self.unestimated_by_team, team, 1)
         else:
             self.issues_with_no_team.append(issue)
 
-        if issue['estimate'] == '':
+        if issue.estimate is None:
             self.issues_with_no_estimate.append(issue)
             self.open_story_points += self.default_issue_story_points
         else:
-            self.open_story_points += float(issue['estimate'])
+            self.open_story_points += float(issue.estimate)
+
+    def velocity(self):
+        working_days = ((date.today() - self.start_date) * 5.0/7.0).days
+        by_assignee = []
+        for assignee, issues in sorted(self.closed_issues_by_assignee.items(), key=lambda item: item[0]):
+            points_completed = sum([int(issue.estimate or 0) for issue in issues])
+            points_per_day = points_completed / working_days
+            points_remaining = self.estimates_by_assignee.get(assignee, 0)
+            days_of_work = (points_remaining / points_per_day) if points_completed else 0
+            by_assignee.append(dict(assignee=assignee, points_completed=points_completed,
+                                    points_per_day=points_per_day, points_remaining=points_remaining,
+                                    days_of_work=days_of_work,
+                                    issues=sorted(issues, key=lambda i: i.closed_at, reverse=True)))
+        return dict(working_days=working_days, by_assignee=by_assignee)
+
+    def summarize(self):
+        estimates_by_assignee = GenReport.sorted_counts(self.estimates_by_assignee)
+        return dict(
+            review_issues=self.review_issues,
+            open_issues_count=self.open_issues_count,
+            open_story_points=self.open_story_points,
+            estimates_by_assignee=estimates_by_assignee,
+            unestimated_by_assignee=GenReport.sorted_counts(self.unestimated_by_assignee),
+            issues_by_assignee=[(assignee, points, sorted(self.issues_by_assignee[assignee],
+                                                          key=lambda i: i.estimate or 0, reverse=True))
+                                for assignee, points in estimates_by_assignee],
+            issue_lists=[
+                ('Issues with no assignee', 'teams pipeline url title'.split(' '),
+                 sorted(self.issues_with_no_assignee, key=lambda i: i.field('teams') or 'unassigned')),
+                ('Issues with no estimate', 'assignee teams pipeline url title'.split(' '),
+                 sorted(self.issues_with_no_estimate, key=lambda i: i.assignee or 'unassigned')),
+                ('Issues with no team', 'assignee pipeline url title'.split(' '),
+                 self.issues_with_no_team),
+            ],
+            velocity=self.velocity())
+
+    def run(self, issues_path, config_path, outputs):
+        for issue in load_issues(issues_path, config_path):
+            self.process_issue(issue)
+
+        report = self.summarize()
+        for fmt, path in outputs:
+            content = RENDERERS[fmt](report)
+            if path == '-':
+                sys.stdout.write(content)
+            else:
+                with open(path, 'w', newline='') as output:
+                    output.write(content)
 
-    def gen_report(self):
-        print(f'\nOpen issues count: {self.open_issues_count}')
-        print(f'Open story points: {int(self.open_story_points)}')
-        GenReport.display_dict("Story points by assignee", self.estimates_by_assignee)
 
-        GenReport.display_dict("Issues with no estimate, by assignee", self.unestimated_by_assignee)
+def display_value(issue, col):
+    value = issue.field(col)
+    if (col == 'assignee') and value == '':
+        value = 'unassigned'
+    if (col == 'teams') and value == '':
+        value = 'noteam'
+    return value
 
-        self.display_issues_by_assignee('Story points per assignee')
 
-        self.write_issues_by_assignee_csv()
+def render_text(report):
+    out = io.StringIO()
+    for issue in report['review_issues']:
+        out.write(f"skipping Review/QA issue {issue.url} {issue.title}\n")
+    out.write(f"\nOpen issues count: {report['open_issues_count']}\n")
+    out.write(f"Open story points: {int(report['open_story_points'])}\n")
+    for title, counts in (('Story points by assignee', report['estimates_by_assignee']),
+                          ('Issues with no estimate, by assignee', report['unestimated_by_assignee'])):
+        out.write(f'\n{title}\n')
+        for key, value in counts:
+            out.write(f'{value:3d} {key}\n')
+
+    out.write('\nStory points per assignee\n')
+    for assignee, points, issues in report['issues_by_assignee']:
+        out.write(f'{points:3d} {assignee}\n')
+        for issue in issues:
+            out.write(f"    {issue.field('estimate')} {issue.field('teams')} {issue.url} {issue.title}")
+            if issue.pipeline in ('In Progress', 'Up Next'):
+                out.write(f" [{issue.pipeline}]")
+            out.write('\n')
+
+    for title, cols, issues in report['issue_lists']:
+        out.write(f"\n{title}: {len(issues)} {float(100 * len(issues) / report['open_issues_count']):.2f}%\n")
+        for issue in issues:
+            out.write('   ' + ''.join(f' {display_value(issue, col)}' for col in cols) + '\n')
+
+    velocity = report['velocity']
+    out.write('\nVelocity by assignee\n')
+    out.write(f"  Working days completed in this release: {velocity['working_days']}\n")
+    for v in velocity['by_assignee']:
+        out.write(f"  {(v['assignee'] or 'unassigned') + ':':14s} {v['points_completed']:2d} pts done -> "
+                  f"{v['points_per_day']:.2f} / day; "
+                  f"{v['points_remaining']:3d} pts for MN-1 -> {int(v['days_of_work']):3d} days "
+                  f" -> {v['days_of_work'] / 21.6:.1f} months\n")
+        for issue in v['issues']:
+            out.write(f"    {issue.closed_at.date()} {issue.field('estimate') or ' '} {issue.url} {issue.title}\n")
+    return out.getvalue()
+
+
+def render_csv(report):
+    out = io.StringIO()
+    report_writer = csv.writer(out, quotechar='"')
+    report_writer.writerow(['assignee', 'estimate', 'team', 'url', 'description'])
+    for assignee, points, issues in report['issues_by_assignee']:
+        for issue in issues:
+            report_writer.writerow([assignee, issue.field('estimate'), issue.field('teams'), issue.url, issue.title])
+    return out.getvalue()
 
-        self.display_issues('Issues with no assignee', self.issues_with_no_assignee,
-                            'teams pipeline url title'.split(' '), 'teams')
-        self.display_issues('Issues with no estimate', self.issues_with_no_estimate,
-                            'assignee teams pipeline url title'.split(' '), 'assignee')
-        self.display_issues('Issues with no team', self.issues_with_no_team,
-                            'assignee pipeline url title'.split(' '))
-        self.display_velocity_report()
 
-    def run(self):
-        self.default_issue_story_points = float(sys.argv[3])
-        with open(sys.argv[1], newline='') as data_file:
-            reader = csv.DictReader(data_file)
-            for issue in reader:
-                self.process_issue(issue)
+def issue_json(issue):
+    return dict(issue=issue.fqn, assignee=issue.assignee, estimate=issue.estimate, pipeline=issue.pipeline,
+                teams=list(issue.teams), closed_at=issue.field('closed_at') or None, url=issue.url,
+                title=issue.title)
 
-            self.gen_report()
+
+def render_json(report):
+    velocity = report['velocity']
+    return json.dumps(dict(
+        review_issues=[issue_json(issue) for issue in report['review_issues']],
+        open_issues_count=report['open_issues_count'],
+        open_story_points=report['open_story_points'],
+        estimates_by_assignee=dict(report['estimates_by_assignee']),
+        unestimated_by_assignee=dict(report['unestimated_by_assignee']),
+        issues_by_assignee=[dict(assignee=assignee, points=points, issues=[issue_json(i) for i in issues])
+                            for assignee, points, issues in report['issues_by_assignee']],
+        issue_lists={title: [issue_json(i) for i in issues] for title, cols, issues in report['issue_lists']},
+        velocity=dict(working_days=velocity['working_days'],
+                      by_assignee=[dict(v, issues=[issue_json(i) for i in v['issues']])
+                                   for v in velocity['by_assignee']])), indent=2) + '\n'
+
+
+def render_html(report):
+    def cell(value):
+        return f'<td>{html.escape(str(value))}</td>'
+
+    def link(issue):
+        return f'<td><a href="{html.escape(issue.url)}">{html.escape(issue.title)}</a></td>'
+
+    out = io.StringIO()
+    out.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Issue report</title></head><body>\n')
+    out.write(f"<p>Open issues count: {report['open_issues_count']}<br>\n"
+              f"Open story points: {int(report['open_story_points'])}</p>\n")
+    for title, counts in (('Story points by assignee', report['estimates_by_assignee']),
+                          ('Issues with no estimate, by assignee', report['unestimated_by_assignee'])):
+        out.write(f'<h2>{html.escape(title)}</h2>\n<table>\n')
+        for key, value in counts:
+            out.write(f'<tr>{cell(value)}{cell(key)}</tr>\n')
+        out.write('</table>\n')
+
+    out.write('<h2>Story points per assignee</h2>\n')
+    for assignee, points, issues in report['issues_by_assignee']:
+        out.write(f'<h3>{html.escape(assignee)}: {points}</h3>\n<table>\n')
+        for issue in issues:
+            out.write(f"<tr>{cell(issue.field('estimate'))}{cell(issue.field('teams'))}{cell(issue.pipeline)}"
+                      f"{link(issue)}</tr>\n")
+        out.write('</table>\n')
+
+    for title, cols, issues in report['issue_lists']:
+        out.write(f'<h2>{html.escape(title)}: {len(issues)}</h2>\n<table>\n')
+        for issue in issues:
+            out.write('<tr>' + ''.join(cell(display_value(issue, col)) for col in cols if col not in ('url', 'title'))
+                      + link(issue) + '</tr>\n')
+        out.write('</table>\n')
+
+    velocity = report['velocity']
+    out.write(f"<h2>Velocity by assignee</h2>\n<p>Working days completed in this release: "
+              f"{velocity['working_days']}</p>\n<table>\n")
+    for v in velocity['by_assignee']:
+        points_per_day = f"{v['points_per_day']:.2f}"
+        out.write(f"<tr>{cell(v['assignee'] or 'unassigned')}{cell(v['points_completed'])}{cell(points_per_day)}"
+                  f"{cell(v['points_remaining'])}{cell(int(v['days_of_work']))}</tr>\n")
+    out.write('</table>\n</body></html>\n')
+    return out.getvalue()
+
+
+RENDERERS = {
+    'text': render_text,
+    'csv': render_csv,
+    'json': render_json,
+    'html': render_html,
+}
+
+DEFAULT_OUTPUTS = [('text', '-'), ('csv', 'assignee_report.csv')]
+
+
+def parse_args(args):
+    '''
+    Split the optional arguments into an optional config.yml and a list of (format, path) outputs,
+    given as format=path, e.g. json=report.json, or text=- for stdout.
+    '''
+    config_path = None
+    outputs = []
+    for arg in args:
+        fmt, sep, path = arg.partition('=')
+        if sep:
+            if fmt not in RENDERERS:
+                print(f'unknown output format {fmt}', file=sys.stderr)
+                return None
+            outputs.append((fmt, path))
+        elif not config_path:
+            config_path = arg
+        else:
+            return None
+    return config_path, outputs or DEFAULT_OUTPUTS
 
 if __name__ == '__main__':
-    if len(sys.argv) != 4:
-        print(f'usage: {sys.argv[0]} issues.csv rel-start-date issue-default-pts', file=sys.stderr)
+    parsed = parse_args(sys.argv[4:]) if len(sys.argv) >= 4 else None
+    if not parsed:
+        print(f'usage: {sys.argv[0]} issues.csv rel-start-date issue-default-pts [config.yml] '
+              f'[{{{",".join(RENDERERS)}}}=path ...]', file=sys.stderr)
         sys.exit(1)
-    GenReport().run()
+    config_path, outputs = parsed
+    gen_report = GenReport()
+    gen_report.default_issue_story_points = float(sys.argv[3])
+    gen_report.start_date = datetime.strptime(sys.argv[2], '%Y-%m-%d').date()
+    gen_report.run(sys.argv[1], config_path, outputs)
@@ -1,8 +1,7 @@
+from config_cache import load_config
 import csv
 import sys
 import time
-import urllib.parse
-import yaml
 from github import Github
 from typing import Set
 from zenhub import Zenhub
@@ -11,7 +10,7 @@ from zenhub import Zenhub
 # our project planning, that we can't get natively from either platform.
 class GetData:
     def __init__(self):
-        self.labels_to_teams = dict()
+        self.team_classifier = None
         self.relationships = dict()
         self.repo_full_names_to_ids = dict()
         self.repo_ids_to_full_names = dict()
@@ -24,15 +23,9 @@ class GetData:
         self.issue_writer = None
         self.rel_writer = None
 
-    def load_labels_to_teams(self):
-        for team, labels_str in self.config['team_labels'].items():
-            labels = urllib.parse.unquote(labels_str.lower()).split(',')
-            for label in labels:
-                ls = self.labels_to_teams.get(label, None)
-                if ls:
-                    ls.append(team)
-                else:
-                    self.labels_to_teams[label] = [team]
+    def load_team_classifier(self):
+        # The team_labels rules are compiled when the config is parsed, and cached with it.
+        self.team_classifier = self.config['team_classifier']
 
     def get_zh_release_id(self, release_name):
         # See https://github.com/ZenHubIO/API#get-release-reports-for-a-repository
@@ -81,18 +74,9 @@ class GetData:
         return epic_data['total_epic_estimates']['value']
 
     def get_owning_teams_for_issue(self, assignee, issue_labels):
-        owning_teams = []
-        # Associate the issue with teams, based on matching labels to teams in config file.
-        for issue_label in issue_labels:
-            team = self.labels_to_teams.get(issue_label, None)
-            if team and team not in owning_teams:
-                owning_teams.append(team[0])
+        # Associate the issue with teams, based on matching labels to the team_labels rules in config file.
         # If there is no label that matches a team, then default to the assignee's team, if any.
-        if not owning_teams and assignee:
-            assignee_team = self.config['person_to_team'].get(assignee, None)
-            if assignee_team:
-                owning_teams.append(assignee_team)
-        return owning_teams
+        return list(self.team_classifier.classify(assignee, issue_labels))
 
     def process_issue(self, repo_id, issue_number):
         fqn = self.form_fqn(repo_id, issue_number)
@@ -132,16 +116,15 @@ class GetData:
                                     gh_issue.title])
 
     def run(self):
-        with open(sys.argv[1], 'r') as config_file, \
-                open(sys.argv[5], 'w', newline='') as issue_file, \
+        with open(sys.argv[5], 'w', newline='') as issue_file, \
                 open(sys.argv[6], 'w', newline='') as rel_file:
-            self.config = yaml.load(config_file, Loader=yaml.FullLoader)
+            self.config = load_config(sys.argv[1])
             self.get_gh_repos_for_orgs()
             release_id = self.get_zh_release_id(sys.argv[4])
             if not release_id:
                 print(f'no such release: {sys.argv[4]}', file=sys.stderr)
                 sys.exit(1)
-            self.load_labels_to_teams()
+            self.load_team_classifier()
 
             self.issue_writer = csv.writer(issue_file, quotechar='"')
             self.rel_writer = csv.writer(rel_file, quotechar='"')
@@ -0,0 +1,90 @@
+import csv
+import sys
+from datetime import datetime
+
+'''
+A compact, shared representation of the rows in the issues.csv file produced by get_issue_data.py.
+
+Each row is parsed exactly once when it is loaded: labels and teams are split into tuples, the estimate
+is converted to a number and the dates to datetimes.  Strings that repeat across many issues (repo,
+assignee, pipeline, label and team names) are interned, and identical label/team sets share one tuple,
+so a large snapshot only holds one copy of each.  The flags the report tools test over and over
+(is_epic, is_pr, is_closed) are computed up front.
+'''
+
+ISSUE_COLUMNS = 'repo issue assignee estimate pipeline labels teams created_at closed_at url title'.split(' ')
+
+_shared_tuples = dict()
+
+
+def intern_list(value: str, sep=';'):
+    if not value:
+        return ()
+    items = tuple(sys.intern(item) for item in value.split(sep))
+    return _shared_tuples.setdefault(items, items)
+
+
+def parse_estimate(value: str):
+    if value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def parse_timestamp(value: str):
+    # The timestamps are written by get_issue_data.py as str(datetime), e.g. "2022-03-01 17:12:45".
+    return datetime.fromisoformat(value) if value else None
+
+
+class Issue:
+    __slots__ = ('repo', 'number', 'fqn', 'assignee', 'estimate', 'pipeline', 'labels', 'teams',
+                 'created_at', 'closed_at', 'url', 'title', 'is_epic', 'is_pr', 'is_closed')
+
+    def __init__(self, row: dict):
+        self.repo = sys.intern(row['repo'])
+        self.number = int(row['issue'])
+        self.fqn = self.repo + '/' + row['issue']
+        self.assignee = sys.intern(row['assignee'])
+        self.estimate = parse_estimate(row['estimate'])
+        self.pipeline = sys.intern(row['pipeline'])
+        self.labels = intern_list(row['labels'].lower())
+        self.teams = intern_list(row['teams'])
+        self.created_at = parse_timestamp(row['created_at'])
+        self.closed_at = parse_timestamp(row['closed_at'])
+        self.url = row['url']
+        self.title = row['title']
+        self.is_epic = 'epic' in self.labels
+        self.is_pr = '/pull/' in self.url
+        self.is_closed = self.closed_at is not None
+
+    def field(self, col: str):
+        '''Return the value of a column formatted as it appears in issues.csv.'''
+        if col == 'issue':
+            return str(self.number)
+        if col in ('labels', 'teams'):
+            return ';'.join(getattr(self, col))
+        value = getattr(self, col)
+        return '' if value is None else str(value)
+
+    def __repr__(self):
+        return f'Issue({self.fqn})'
+
+
+def load_issues(issues_path, config_path=None):
+    '''
+    Yield an Issue for each row of an issues.csv file.  If a config.yml is given, the teams of each issue are
+    recomputed from its labels and assignee with that config's current team rules, instead of taken from the
+    file, so that old snapshots can be re-classified after the team mapping changes.
+    '''
+    team_classifier = None
+    if config_path:
+        from config_cache import load_config
+        team_classifier = load_config(config_path)['team_classifier']
+    with open(issues_path, newline='') as data_file:
+        for row in csv.DictReader(data_file):
+            issue = Issue(row)
+            if team_classifier:
+                issue.teams = team_classifier.classify(issue.assignee, issue.labels)
+            yield issue
@@ -1,54 +1,130 @@
+from concurrent.futures import ThreadPoolExecutor
+from config_cache import load_config
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import sys
+import threading
+import time
 
 '''
-A program to get this basic information about all OPEN issues in a particular GitHub Organization, across
-all of its repositories:
+A program to get this basic information about all OPEN issues in one or more GitHub Organizations, across
+all of their repositories:
     * Global id
     * Repository name
     * Issue number
     * GitHub V2 Projects it belongs to
     * Labels names
+The orgs are either given on the command line, or read from the github_orgs entry of a config.yml file.
+All the repositories of all the orgs are fetched concurrently, sharing one HTTP connection pool and one
+GitHub rate limit budget, and the results are merged into a single list de-duplicated on the global issue id.
 This script uses the GitHub GraphQL API documented here: https://docs.github.com/en/graphql
 '''
 class IssueRetriever:
-    def __init__(self, github_pat, org):
+    MAX_CONCURRENT_REQUESTS = 8
+    MAX_RATE_LIMIT_RETRIES = 5
+
+    def __init__(self, github_pat, orgs):
         self.github_pat = github_pat
-        self.org = org
+        self.orgs = orgs
         self.headers = {"Authorization": f'bearer {self.github_pat}'}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=IssueRetriever.MAX_CONCURRENT_REQUESTS)
+        self.session.mount('https://', adapter)
+        # All worker threads draw from the same rate limit budget.  GitHub reports the remaining budget and
+        # its reset time in the response headers, so once it runs out every thread waits for the reset.
+        self.rate_limit_lock = threading.Lock()
+        self.rate_limit_reset = 0
 
-    def run_query(self, query):
-        request = requests.post('https://api.github.com/graphql', json={'query': query}, headers=self.headers)
-        if request.status_code == 200:
-            return request.json()
+    def wait_for_rate_limit(self):
+        with self.rate_limit_lock:
+            delay = self.rate_limit_reset - time.time()
+        if delay > 0:
+            print(f'rate limit exhausted, waiting {int(delay)}s', file=sys.stderr)
+            time.sleep(delay)
+
+    @staticmethod
+    def is_rate_limited(request, result):
+        # GitHub answers a GraphQL request over the primary rate limit with a 200 whose errors include one of type
+        # RATE_LIMITED (or with 403/429), and X-RateLimit-Remaining 0.  A request over a secondary (abuse) rate
+        # limit gets a 403 or 429 with a Retry-After header or an explanatory message.
+        if result is not None:
+            errors = result.get('errors') or []
+            return any(error.get('type') == 'RATE_LIMITED' for error in errors) or \
+                (bool(errors) and request.headers.get('X-RateLimit-Remaining') == '0')
+        if request.status_code not in (403, 429):
+            return False
+        return request.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in request.headers \
+            or 'rate limit' in request.text.lower()
+
+    def update_rate_limit(self, request, result):
+        if not IssueRetriever.is_rate_limited(request, result):
+            return
+        if 'Retry-After' in request.headers:
+            reset = time.time() + int(request.headers['Retry-After'])
+        elif request.headers.get('X-RateLimit-Remaining') == '0':
+            reset = int(request.headers.get('X-RateLimit-Reset', time.time() + 60))
         else:
-            raise Exception("Query failed to run by returning code of {}. {}".format(request.status_code, query))
+            reset = time.time() + 60
+        with self.rate_limit_lock:
+            self.rate_limit_reset = max(self.rate_limit_reset, reset)
 
-    def get_org_repos(self):
-        query = f'''
-        {{
-          organization(login: "{self.org}") {{
-            repositories(first: 50, isFork: false) {{
-              nodes {{
-                name
-                id
-                isArchived
+    def run_query(self, query):
+        # Requests that were already in flight when the budget ran out are rate limited too; they wait for the
+        # reset along with every other thread, and are then retried.
+        for attempt in range(IssueRetriever.MAX_RATE_LIMIT_RETRIES + 1):
+            self.wait_for_rate_limit()
+            request = self.session.post('https://api.github.com/graphql', json={'query': query},
+                                        headers=self.headers)
+            result = request.json() if request.status_code == 200 else None
+            self.update_rate_limit(request, result)
+            if IssueRetriever.is_rate_limited(request, result):
+                continue
+            if result is None:
+                break
+            if 'errors' in result:
+                raise Exception(f'Query failed with errors {result["errors"]}. {query}')
+            return result
+        raise Exception("Query failed to run by returning code of {}. {}".format(request.status_code, query))
+
+    def get_org_repos(self, org):
+        repos = []
+        after = ''
+        has_next_page = True
+        while has_next_page:
+            query = f'''
+            {{
+              organization(login: "{org}") {{
+                repositories(first: 100, isFork: false{after}) {{
+                  pageInfo {{
+                    hasNextPage
+                    endCursor
+                  }}
+                  nodes {{
+                    name
+                    id
+                    isArchived
+                  }}
+                }}
               }}
             }}
-          }}
-        }}
-        '''
-        return self.run_query(query)['data']['organization']['repositories']['nodes']
+            '''
+            results = self.run_query(query)['data']['organization']['repositories']
+            repos += results['nodes']
+            has_next_page = results['pageInfo']['hasNextPage']
+            if has_next_page:
+                after = f', after: "{results["pageInfo"]["endCursor"]}"'
+        return repos
 
-    def get_repo_issues(self, repo, issues):
+    def get_repo_issues(self, org, repo):
+        issues = []
         after = ''
         has_next_page = True
         while has_next_page:
             query = f'''
             {{
               viewer {{
-                organization(login: "{self.org}") {{
+                organization(login: "{org}") {{
                   id
                   repository(name: "{repo['name']}") {{
                     issues(first: 50, states: OPEN{after}) {{
@@ -73,6 +149,9 @@ class IssueRetriever:
                           }}
                           repository {{
                               name
+                              owner {{
+                                login
+                              }}
                           }}
                         }}
                       }}
@@ -88,7 +167,7 @@ class IssueRetriever:
                      in results['data']['viewer']['organization']['repository']['issues']['edges']]
             if len(edges):
                 issues += edges
-                print(f'  got {len(edges)} issues from {repo["name"]}, last = {edges[len(edges) - 1]["number"]}',
+                print(f'  got {len(edges)} issues from {org}/{repo["name"]}, last = {edges[len(edges) - 1]["number"]}',
                       file=sys.stderr)
             page_info = results['data']['viewer']['organization']['repository']['issues']['pageInfo']
             has_next_page = page_info['hasNextPage']
@@ -97,15 +176,26 @@ class IssueRetriever:
         return issues
 
     def run(self):
-        repos = self.get_org_repos()
-        issues = []
-        for repo in repos:
-            issues = self.get_repo_issues(repo, issues)
-            print(f'repo {repo["name"]} has {len(issues)} issues', file=sys.stderr)
-        print(json.dumps(issues, indent=2))
+        with ThreadPoolExecutor(max_workers=IssueRetriever.MAX_CONCURRENT_REQUESTS) as executor:
+            org_repos = executor.map(self.get_org_repos, self.orgs)
+            # Fetch every repo of every org as its own task, so the total time is bounded by the
+            # largest repo rather than by the sum of the orgs.
+            repo_futures = [(org, repo, executor.submit(self.get_repo_issues, org, repo))
+                            for org, repos in zip(self.orgs, org_repos) for repo in repos]
+            issues_by_id = dict()
+            for org, repo, future in repo_futures:
+                repo_issues = future.result()
+                print(f'repo {org}/{repo["name"]} has {len(repo_issues)} issues', file=sys.stderr)
+                for issue in repo_issues:
+                    issues_by_id.setdefault(issue['id'], issue)
+        print(json.dumps(list(issues_by_id.values()), indent=2))
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print(f'usage: {sys.argv[0]} GHPAT org', file=sys.stderr)
+    if len(sys.argv) < 3:
+        print(f'usage: {sys.argv[0]} GHPAT (org [org ...] | config.yml)', file=sys.stderr)
         sys.exit(1)
-    IssueRetriever(sys.argv[1], sys.argv[2]).run()
\ No newline at end of file
+    if len(sys.argv) == 3 and sys.argv[2].endswith(('.yml', '.yaml')):
+        orgs = load_config(sys.argv[2])['github_orgs']
+    else:
+        orgs = sys.argv[2:]
+    IssueRetriever(sys.argv[1], orgs).run()
\ No newline at end of file
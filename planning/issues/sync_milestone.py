@@ -1,6 +1,6 @@
-import csv
 from github import Github
 import sys
+from issue_record import load_issues
 
 '''
 We use ZenHub Releases to do our project planning. These Releases are a ZenHub only 
@@ -44,21 +44,21 @@ class Sync:
         return repo_data
 
     def process_issue(self, issue):
-        if '/pull/' in issue['url']:
+        if issue.is_pr:
             return
 
-        repo_data = self.get_gh_repo_and_milestones(issue['repo'])
+        repo_data = self.get_gh_repo_and_milestones(issue.repo)
         # If the target milestone is not in the repo, then skip it.  If we want it, we'll manually add
         # the label to the repo, but that will not always be the case.
         if not repo_data.target_milestone:
             return
 
         # See https://pygithub.readthedocs.io/en/latest/github_objects/Repository.html#github.Repository.Repository.get_issue
-        gh_issue = repo_data.gh_repo.get_issue(int(issue["issue"]))
+        gh_issue = repo_data.gh_repo.get_issue(issue.number)
         if gh_issue.milestone and gh_issue.milestone.id == repo_data.target_milestone.id:
             return
 
-        print(f'ADD milestone to issue {issue["issue"]} {gh_issue.html_url}')
+        print(f'ADD milestone to issue {issue.number} {gh_issue.html_url}')
         # See https://pygithub.readthedocs.io/en/latest/github_objects/Issue.html#github.Issue.Issue.edit
         gh_issue.edit(milestone=repo_data.target_milestone)
 
@@ -84,10 +84,8 @@ class Sync:
                     gh_issue.edit(milestone=None)
 
     def read_release_issues(self, issues_path):
-        with open(issues_path, newline='') as data_file:
-            reader = csv.DictReader(data_file)
-            for issue in reader:
-                self.release_issues[Sync.form_fqn(issue['repo'], issue['issue'])] = issue
+        for issue in load_issues(issues_path):
+            self.release_issues[issue.fqn] = issue
 
     def run(self, issues_path):
         self.read_release_issues(issues_path)
@@ -0,0 +1,105 @@
+import fnmatch
+import re
+import sys
+import urllib.parse
+
+'''
+Classify issues into owning teams from their labels, using the team_labels, person_to_team and optional
+team_priorities entries of config.yml.
+
+Each team_labels entry is a comma separated list of label rules, each of which is URL encoded, so a rule
+can contain a comma written as %2C:
+    * "zoe"         matches the label "zoe" exactly
+    * "inter-*"     matches any label starting with "inter-"
+    * "ui-?", "[ab]*"   any other glob pattern, as in fnmatch
+    * "re:^v\\d+$"   a regular expression, which must match the whole label
+Labels are compared in lower case, so exact, prefix and glob rules are lower cased too.  Regular expressions
+are used exactly as written, since lower casing would change their meaning.
+
+When an issue matches several teams, they are ordered by the team's priority in team_priorities (higher
+first, default 0), then by how specific the matching rule is (exact, then prefix, then pattern), then by
+the order of the issue's labels.  If no label matches, the issue belongs to its assignee's team, if any.
+
+The rules are compiled once into an index: a dict for exact labels, a trie for prefixes, and a list of
+compiled patterns.  The teams of each distinct label are computed only once, so re-classifying a whole
+snapshot costs little more than reading it.
+'''
+
+EXACT, PREFIX, PATTERN = 0, 1, 2
+
+GLOB_CHARS = re.compile(r'[*?\[]')
+
+# Key of a trie node's list of rules, which can never collide with a one character edge.
+RULES = ''
+
+
+def parse_rule(rule: str):
+    rule = urllib.parse.unquote(rule)
+    if rule.startswith('re:'):
+        return PATTERN, re.compile(rule[3:])
+    rule = rule.lower()
+    if not GLOB_CHARS.search(rule):
+        return EXACT, rule
+    if rule.endswith('*') and not GLOB_CHARS.search(rule[:-1]):
+        return PREFIX, rule[:-1]
+    return PATTERN, re.compile(fnmatch.translate(rule))
+
+
+class TeamClassifier:
+    def __init__(self, team_labels: dict, person_to_team: dict, team_priorities: dict = None):
+        self.person_to_team = dict(person_to_team or {})
+        self.exact = dict()
+        self.prefix_trie = dict()
+        self.patterns = []
+        self.label_matches = dict()
+        team_priorities = team_priorities or {}
+        for team_order, (team, rules_str) in enumerate(team_labels.items()):
+            team = sys.intern(team)
+            for rule in rules_str.split(','):
+                kind, matcher = parse_rule(rule)
+                # Matches are ranked by this key, lowest first.
+                match = (-team_priorities.get(team, 0), kind, team_order, team)
+                if kind == EXACT:
+                    self.exact.setdefault(matcher, []).append(match)
+                elif kind == PREFIX:
+                    node = self.prefix_trie
+                    for char in matcher:
+                        node = node.setdefault(char, dict())
+                    node.setdefault(RULES, []).append(match)
+                else:
+                    self.patterns.append((matcher, match))
+
+    def match_label(self, label: str):
+        '''Return the (priority, kind, team order, team) ranks of the rules matching a single label.'''
+        matches = self.label_matches.get(label)
+        if matches is None:
+            matches = list(self.exact.get(label, ()))
+            node = self.prefix_trie
+            matches += node.get(RULES, ())
+            for char in label:
+                node = node.get(char)
+                if node is None:
+                    break
+                matches += node.get(RULES, ())
+            matches += [match for pattern, match in self.patterns if pattern.fullmatch(label)]
+            self.label_matches[label] = matches
+        return matches
+
+    def classify(self, assignee: str, labels):
+        '''Return the tuple of teams owning an issue with the given assignee and (lower case) labels.'''
+        best = dict()
+        for label_index, label in enumerate(labels):
+            for neg_priority, kind, team_order, team in self.match_label(label):
+                rank = (neg_priority, kind, label_index, team_order)
+                if team not in best or rank < best[team]:
+                    best[team] = rank
+        if best:
+            return tuple(sorted(best, key=best.get))
+        assignee_team = self.person_to_team.get(assignee) if assignee else None
+        return (assignee_team,) if assignee_team else ()
+
+    def __getstate__(self):
+        # The per label results depend only on the rules, but there is no point persisting them.
+        state = dict(self.__dict__)
+        state['label_matches'] = dict()
+        return state
@@ -0,0 +1,44 @@
+import unittest
+from team_rules import TeamClassifier
+
+
+class TestTeamClassifier(unittest.TestCase):
+    def classifier(self, team_labels, person_to_team=None, team_priorities=None):
+        return TeamClassifier(team_labels, person_to_team or {}, team_priorities)
+
+    def test_exact_prefix_and_glob_rules(self):
+        c = self.classifier({'wallet': 'Wallet,dapp%20%26%20ui%20support', 'endo': 'endo-*,sub?'})
+        self.assertEqual(c.classify('', ['wallet']), ('wallet',))
+        self.assertEqual(c.classify('', ['dapp & ui support']), ('wallet',))
+        self.assertEqual(c.classify('', ['endo-foo']), ('endo',))
+        self.assertEqual(c.classify('', ['subx']), ('endo',))
+        self.assertEqual(c.classify('', ['bug']), ())
+
+    def test_regex_rules_are_not_lower_cased(self):
+        c = self.classifier({'kernel': r're:^v\D+$'})
+        self.assertEqual(c.classify('', ['vx']), ('kernel',))
+        self.assertEqual(c.classify('', ['v1']), ())
+
+    def test_regex_rules_with_encoded_comma(self):
+        c = self.classifier({'kernel': r're:v\d{1%2C3},swingset'})
+        self.assertEqual(c.classify('', ['v12']), ('kernel',))
+        self.assertEqual(c.classify('', ['v1234']), ())
+        self.assertEqual(c.classify('', ['swingset']), ('kernel',))
+
+    def test_regex_rules_with_groups_and_flags(self):
+        c = self.classifier({'a': r're:(x)\1', 'b': r're:(y)\1', 'c': 're:(?i)zoe', 'd': 're:(?P<n>q)+'})
+        self.assertEqual(c.classify('', ['xx']), ('a',))
+        self.assertEqual(c.classify('', ['yy']), ('b',))
+        self.assertEqual(c.classify('', ['zoe']), ('c',))
+        self.assertEqual(c.classify('', ['qqq']), ('d',))
+
+    def test_ordering_and_assignee_fallback(self):
+        c = self.classifier({'zoe': 'zoe', 'kernel': 'swingset', 'endo': 're:s.*'},
+                            {'warner': 'kernel'}, {'kernel': 5})
+        self.assertEqual(c.classify('', ['zoe', 'swingset']), ('kernel', 'zoe', 'endo'))
+        self.assertEqual(c.classify('warner', []), ('kernel',))
+        self.assertEqual(c.classify('warner', ['zoe']), ('zoe',))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 import csv
-from datetime import date, datetime
+from datetime import date
 import os
 import sys
+from issue_record import load_issues
 
 #
 # Generate an SVG file which shows the Epic and blocker relationships between issues, as well as
@@ -11,9 +12,6 @@ import sys
 
 NO_TEAM = ""
 
-def get_issue_fqn(issue):
-    return issue['repo'] + '/' + issue['issue']
-
 issues_to_node_ids = dict()
 
 def issue_fqn_to_node_id(issue_fqn, alloc=True):
@@ -25,11 +23,11 @@ def issue_fqn_to_node_id(issue_fqn, alloc=True):
     return issues_to_node_ids[issue_fqn]
 
 def write_issue_node(issue, output, indent=4):
-    issue_fqn = get_issue_fqn(issue)
+    issue_fqn = issue.fqn
     node_id = issue_fqn_to_node_id(issue_fqn)
     shape = None
-    estimate = -1 if issue['estimate'] == '' else int(issue['estimate'])
-    issue_age = date.today() - datetime.strptime(issue['created_at'].split(' ')[0], '%Y-%m-%d').date()
+    estimate = -1 if issue.estimate is None else int(issue.estimate)
+    issue_age = date.today() - issue.created_at.date()
     peripheries = 1
     if estimate >= 13:
         peripheries = 4
@@ -39,11 +37,11 @@ def write_issue_node(issue, output, indent=4):
         peripheries = 2
     if estimate == -1:
         estimate = '?'
-    assignee = issue["assignee"] if issue["assignee"] else '?'
-    title = issue["title"].replace('"', '').replace('{', '')
+    assignee = issue.assignee if issue.assignee else '?'
+    title = issue.title.replace('"', '').replace('{', '')
     output.write(f'{" " * indent}n_{node_id} [label="{title:.30s}\\n{assignee} '
                  f'{estimate} {issue_fqn[issue_fqn.index("/") + 1:]}"')
-    if 'epic' in issue['labels']:
+    if issue.is_epic:
         output.write(f'; shape="octagon"; style="filled"; fillcolor="goldenrod1"')
     elif estimate == '?' or assignee == '?':
         output.write(f'; color="darkmagenta"; penwidth="3"')
@@ -52,9 +50,9 @@ def write_issue_node(issue, output, indent=4):
     if shape:
         output.write(f'; shape="{shape}"')
     fill_color = None
-    if 'New Issues' in issue['pipeline']:
+    if 'New Issues' in issue.pipeline:
         fill_color = 'chartreuse'
-    elif issue['pipeline'] == 'In Progress':
+    elif issue.pipeline == 'In Progress':
         fill_color = 'skyblue'
     elif issue_age.days < 14:
         fill_color = 'aquamarine'
@@ -62,30 +60,27 @@ def write_issue_node(issue, output, indent=4):
         fill_color = 'gray93'
     else:
         fill_color = 'white'
-    if fill_color and 'epic' not in issue['labels']:
+    if fill_color and not issue.is_epic:
         output.write(f'; style="filled"; fillcolor="{fill_color}"')
-    output.write(f'; URL="{issue["url"]}"; tooltip="{title}"];\n')
+    output.write(f'; URL="{issue.url}"; tooltip="{title}"];\n')
 
 def main():
-    with open(sys.argv[1], newline='') as issues_file, open(sys.argv[2], newline='') as rels_file, \
-            open(sys.argv[3], 'w') as output:
+    with open(sys.argv[2], newline='') as rels_file, open(sys.argv[3], 'w') as output:
 
         issues_by_team = dict()
         issues_by_fqn = dict()
 
-        issues_reader = csv.DictReader(issues_file)
-        for issue in issues_reader:
-            if issue['closed_at']:
+        for issue in load_issues(sys.argv[1], sys.argv[4] if len(sys.argv) == 5 else None):
+            if issue.is_closed:
                 continue
-            if '/pull/' in issue['url']:
+            if issue.is_pr:
                 continue
-            issue['fqn'] = get_issue_fqn(issue)
             # If an issue is has labeled with multiple teams, just take the first ...
-            team = issue['teams'].split(';')[0] or 'no-team'
+            team = issue.teams[0] if issue.teams else 'no-team'
             if team not in issues_by_team:
                 issues_by_team[team] = []
             issues_by_team[team].append(issue)
-            issues_by_fqn[issue['fqn']] = issue
+            issues_by_fqn[issue.fqn] = issue
 
         # Pre-process the sub issue to epic relationship, we need this to generate proper Epic clusters.
         subs_to_epic = dict()
@@ -114,18 +109,18 @@ def main():
             # First pass, seed the issue_by_epic dict from the Epics (the rels file includes
             # Epic relationships for closed Epics, so can't seed this correctly) from rels.
             for issue in issues_by_team[team]:
-                if 'epic' in issue['labels']:
-                    print(f'{team} Epic {issue["fqn"]}')
-                    issues_by_epic[issue['fqn']] = [issue]
+                if issue.is_epic:
+                    print(f'{team} Epic {issue.fqn}')
+                    issues_by_epic[issue.fqn] = [issue]
 
             # Second pass, if we find a sub issue of an Epic that is in this team cluster,
             # then add it.
             for issue in issues_by_team[team]:
-                if issue['fqn'] in subs_to_epic:
-                    print(f'{team} found sub {issue["fqn"]}')
+                if issue.fqn in subs_to_epic:
+                    print(f'{team} found sub {issue.fqn}')
 
-                if issue['fqn'] in subs_to_epic and subs_to_epic[issue['fqn']] in issues_by_epic:
-                    issues_by_epic[subs_to_epic[issue['fqn']]].append(issue)
+                if issue.fqn in subs_to_epic and subs_to_epic[issue.fqn] in issues_by_epic:
+                    issues_by_epic[subs_to_epic[issue.fqn]].append(issue)
                 else:
                     non_epic_issues.append(issue)
 
@@ -138,7 +133,7 @@ def main():
                 cluster_num += 1
                 for sub_issue in issues_by_epic[epic_fqn]:
                     # Don't emit an Epic sub issue of this Epic, it'll be in its own cluster.
-                    if sub_issue['fqn'] == epic_fqn or 'epic' not in sub_issue['labels']:
+                    if sub_issue.fqn == epic_fqn or not sub_issue.is_epic:
                         write_issue_node(sub_issue, output, 6)
 
                 output.write(f'    }}\n')
@@ -152,8 +147,8 @@ def main():
             from_issue = issues_by_fqn.get(from_fqn, None)
             to_issue = issues_by_fqn.get(to_fqn, None)
             if from_issue and to_issue:
-                from_node = issue_fqn_to_node_id(from_issue['fqn'], False)
-                to_node = issue_fqn_to_node_id(to_issue['fqn'], False)
+                from_node = issue_fqn_to_node_id(from_issue.fqn, False)
+                to_node = issue_fqn_to_node_id(to_issue.fqn, False)
                 if from_node and to_node:
                     output.write(f'  n_{to_node} -> n_{from_node};\n')
 
@@ -168,4 +163,7 @@ def main():
     os.system(f'fdp -Tsvg -O {sys.argv[3]}')
 
 if __name__ == '__main__':
+    if len(sys.argv) not in (4, 5):
+        print(f'usage: {sys.argv[0]} issues.csv rels.csv output.dot [config.yml]', file=sys.stderr)
+        sys.exit(1)
     main()